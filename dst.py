@@ -4,10 +4,12 @@ import argparse
 import logging
 import random
 import sys
+import time
 from collections import deque
 from typing import List
 
 from rich.console import Console, Group, RenderableType
+from rich.errors import MarkupError
 from rich.layout import Layout
 from rich.live import Live
 from rich.logging import RichHandler
@@ -34,12 +36,14 @@ console = Console()
 class LayoutLogHandler(logging.Handler):
     def __init__(self, level=logging.NOTSET):
         super().__init__(level)
-        self.messages = deque()
+        # Only the tail is ever shown, so cap the history to bound memory. The
+        # raw markup is stored and only turned into `Text` when rendered.
+        self.messages = deque(maxlen=2000)
 
     def emit(self, record: logging.LogRecord):
         # Special case for step headers - no level name
         if record.levelno == HEADER:
-            self.messages.append(Text.from_markup(f"{record.getMessage()}"))
+            self.messages.append(record.getMessage())
             return
 
         # Color based on log level, but don't add markup - let Rich handle it
@@ -56,39 +60,76 @@ class LayoutLogHandler(logging.Handler):
         # Pad the log level name to a consistent width (7 covers "WARNING")
         level_name = record.levelname.ljust(7)
 
-        # Create a Text object with markup enabled - no timestamp
-        self.messages.append(
-            Text.from_markup(f"[{style}]{level_name}[/] {record.getMessage()}")
-        )
+        # Line the rest of a multi-line record up under its first line, past
+        # the level name
+        indent = " " * (len(level_name) + 1)
+        message = record.getMessage().replace("\n", "\n" + indent)
+
+        # Keep the markup with no timestamp
+        self.messages.append(f"[{style}]{level_name}[/] {message}")
 
     def get_renderables(self, height=None) -> List[RenderableType]:
+        # This runs on the Live refresh thread while logging appends to the deque,
+        # so take a copy first. Copying is a single C call, unlike iterating in
+        # Python, which fails if an append lands in between.
+        messages = list(self.messages)
+
         # If height is provided, return only the most recent messages that fit
         if height is not None and height > 0:
             # Account for panel borders and title - approximately 6 lines
             available_lines = max(1, height - 6)
-            # Return only the most recent messages that will fit
-            return list(self.messages)[-available_lines:]
+
+            # Walk back from the newest message, counting the lines of
+            # multi-line records, until the panel is full
+            visible = []
+            used_lines = 0
+            for message in reversed(messages):
+                used_lines += message.count("\n") + 1
+                if used_lines > available_lines and visible:
+                    break
+                visible.append(message)
+
+            visible.reverse()
+            return [_to_text(message) for message in visible]
         # Otherwise return all messages
-        return list(self.messages)
+        return [_to_text(message) for message in messages]
+
+
+def _to_text(message: str) -> Text:
+    """Render a stored message's markup, showing it as-is if the markup is invalid"""
+    # Messages are only rendered long after `emit`, so a stray tag (say from an
+    # exception message) would otherwise break every refresh it stays in view
+    try:
+        return Text.from_markup(message)
+    except MarkupError:
+        return Text(message)
 
 
 class LogPanel:
     """Panel that shows the logs from our custom handler"""
 
+    # How often to re-probe the terminal size, in seconds
+    HEIGHT_PROBE_INTERVAL = 1.0
+
     def __init__(self, log_handler: LayoutLogHandler):
         self.log_handler = log_handler
+        self._cached_height = None
+        self._last_probe = 0.0
 
     def __rich__(self) -> Panel:
-        # Try to get the current terminal height
-        height = None
-        try:
-            _, height = console.size
-        except:
-            # If we can't get the size, don't limit messages
-            pass
+        # Querying the terminal size is a syscall, so only re-probe it
+        # occasionally rather than on every refresh
+        now = time.monotonic()
+        if now - self._last_probe > self.HEIGHT_PROBE_INTERVAL:
+            self._last_probe = now
+            try:
+                _, self._cached_height = console.size
+            except:
+                # If we can't get the size, don't limit messages
+                self._cached_height = None
 
         return Panel(
-            Group(*self.log_handler.get_renderables(height)),
+            Group(*self.log_handler.get_renderables(self._cached_height)),
             title="Logs",
             border_style="blue",
         )
@@ -156,7 +197,7 @@ def main():
 
     layout, progress, sim_number_id, action_id = create_layout(steps=args.steps)
 
-    with Live(layout, console=console, refresh_per_second=10):
+    with Live(layout, console=console, refresh_per_second=4):
         # Display initial configuration
         console.print(
             Panel.fit(
@@ -192,9 +233,17 @@ def main():
         console.print(table)
         console.print()
 
-        success = run_simulation(
-            actions, progress, sim_number_id, action_id, args.seed, args.steps
-        )
+        # The log panel already shows everything while the layout is live, so
+        # only send warnings and errors through the console handler as well.
+        # Those are still in the terminal's scrollback once the layout is gone.
+        console_handler.setLevel(logging.WARNING)
+        try:
+            success = run_simulation(
+                actions, progress, sim_number_id, action_id, args.seed, args.steps
+            )
+        finally:
+            console_handler.setLevel(logging.NOTSET)
+
         sys.exit(0 if success else 1)
 
 
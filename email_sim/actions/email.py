@@ -3,8 +3,9 @@ import logging
 import re
 import time
 from datetime import datetime
-from email import message_from_bytes
 from email.message import EmailMessage
+from email.parser import BytesParser
+from email.policy import default as default_policy
 from pathlib import Path
 
 import aiosmtplib
@@ -12,10 +13,20 @@ import aiosmtplib
 from email_sim.actions import SimulationAction, register_action
 from email_sim.controller import DockerTimeController
 from email_sim.generator import DataGenerator
-from email_sim.generator.email import GeneratedEmail
+from email_sim.generator.email import GeneratedEmail, format_email_date
 
 logger = logging.getLogger("dst")
 
+# Backoff between checks for a delivered email, in seconds
+VALIDATION_INITIAL_BACKOFF = 0.005
+VALIDATION_MAX_BACKOFF = 0.08
+
+# Characters Exim replaces in the subject when naming the delivered file
+_SUBJECT_SUB = re.compile(r'[/:*?"<>|\\]')
+
+# Modern parser so headers come back unfolded and parts decode via get_content()
+_PARSER = BytesParser(policy=default_policy)
+
 
 class EmailValidator:
     """Validates that an email was received correctly"""
@@ -24,56 +35,71 @@ class EmailValidator:
         self.generated_email = generated_email
         self.mail_dir = Path("./tmp/mail")
 
+        # The email never changes, so work out what to expect once rather than on
+        # every validation attempt. The subject is sanitized to match how Exim
+        # would process it.
+        sanitized_subject = _SUBJECT_SUB.sub("_", generated_email.subject)
+        self.expected_file = (
+            self.mail_dir / generated_email.recipient.email / f"{sanitized_subject}.eml"
+        )
+        self.expected_date = format_email_date(generated_email.date)
+
     @property
     def timeout(self) -> float:
         return 5.0  # 5 second timeout for email delivery
 
+    def is_delivered(self) -> bool:
+        """Cheap check for whether the email file exists and has content yet"""
+        try:
+            return self.expected_file.stat().st_size > 0
+        except FileNotFoundError:
+            return False
+
     def validate(self, controller: DockerTimeController) -> bool:
         """Verify that the email was received by checking the mail directory."""
-        recipient_dir = self.mail_dir / self.generated_email.recipient.email
-
-        # Sanitize the subject to match how Exim would process it
-        sanitized_subject = re.sub(r'[/:*?"<>|\\]', "_", self.generated_email.subject)
-        expected_file = recipient_dir / f"{sanitized_subject}.eml"
-
-        if expected_file.exists():
-            try:
-                email_content = expected_file.read_bytes()
-                email_msg = message_from_bytes(email_content)
-
-                if email_msg["Subject"] != self.generated_email.subject:
-                    logger.error(
-                        f"Subject mismatch: Expected: {self.generated_email.subject}, Received: {email_msg['Subject']}"
-                    )
-                    return False
+        # Bind everything compared below to locals once
+        generated_email = self.generated_email
+        expected_file = self.expected_file
+        expected_subject = generated_email.subject
+        expected_date = self.expected_date
+        expected_text = generated_email.text_content
+        expected_html = generated_email.html_content
+
+        # Callers check `is_delivered()` first, so just open the file instead of
+        # checking that it exists again
+        try:
+            with open(expected_file, "rb") as f:
+                email_msg = _PARSER.parse(f)
 
-                if email_msg["Date"] != self.generated_email.date.strftime(
-                    "%a, %d %b %Y %H:%M:%S +0000"
-                ):
-                    logger.error(
-                        f"Date mismatch: Expected: {self.generated_email.date.strftime('%a, %d %b %Y %H:%M:%S +0000')}, Received: {email_msg['Date']}"
-                    )
-                    return False
+            if email_msg["Subject"] != expected_subject:
+                logger.error(
+                    f"Subject mismatch: Expected: {expected_subject}, Received: {email_msg['Subject']}"
+                )
+                return False
 
-                payload = email_msg.get_payload()
-
-                for part in payload:
-                    if part.get_content_type() == "text/plain":
-                        if part.get_payload() != self.generated_email.text_content:
-                            logger.error("Text content mismatch")
-                            return False
-                    elif part.get_content_type() == "text/html":
-                        if part.get_payload() != self.generated_email.html_content:
-                            logger.error("HTML content mismatch")
-                            return False
-
-                return True
-            except Exception as e:
-                logger.error(f"Error reading email: {e}")
+            if email_msg["Date"] != expected_date:
+                logger.error(
+                    f"Date mismatch: Expected: {expected_date}, Received: {email_msg['Date']}"
+                )
                 return False
 
-        logger.debug(f"Email not found at: {expected_file}")
-        return False
+            for part in email_msg.iter_parts():
+                if part.get_content_type() == "text/plain":
+                    if part.get_content() != expected_text:
+                        logger.error("Text content mismatch")
+                        return False
+                elif part.get_content_type() == "text/html":
+                    if part.get_content() != expected_html:
+                        logger.error("HTML content mismatch")
+                        return False
+
+            return True
+        except FileNotFoundError:
+            logger.debug(f"Email not found at: {expected_file}")
+            return False
+        except Exception as e:
+            logger.error(f"Error reading email: {e}")
+            return False
 
 
 @register_action
@@ -97,16 +123,14 @@ class SendBasicEmail(SimulationAction):
                 validate_certs=False,
             )
 
-            # Start connection process
-            logger.debug("Opening connection to SMTP server...")
-            connect_task = asyncio.create_task(smtp.connect())
+            # Nothing else needs to happen while connecting, so just await it
             logger.debug(f"Connecting to SMTP server at {host}:{port}...")
-
-            # Check connection result
-            await connect_task
+            await smtp.connect()
             logger.debug("Connection established")
 
-            # Start send process
+            # The send has to be in flight while we wait on the send queue below,
+            # so it does need its own task. If anything fails before it is
+            # awaited, `controller.run_coro` cancels it.
             logger.debug("Ready to send email...")
             send_task = asyncio.create_task(smtp.send_message(email))
             logger.info("Sending email...")
@@ -139,13 +163,16 @@ class SendBasicEmail(SimulationAction):
         self, controller: DockerTimeController, data_generator: DataGenerator
     ) -> bool:
         try:
+            # Make sure the services see any deferred time advances before sending
+            controller.flush_time()
+
             # Get current simulated time
             current_time = controller.get_time()
 
             generated_email = GeneratedEmail(data_generator, current_time)
 
             # Use localhost and mapped port to send email
-            success = asyncio.run(
+            success = controller.run_coro(
                 self.send_test_email(
                     "localhost",
                     controller.send_port,
@@ -161,7 +188,7 @@ class SendBasicEmail(SimulationAction):
             # Ie exim continously ticks / spins until the time changes. So we need to advance time at exactly this
             # point. Luckily, this happens at the same time that an email enters the receive queue. Thus, we wait for
             # the email to enter the receive queue and then advance time.
-            controller.wait_to_reach_receive_queue()
+            controller.run_coro(controller.wait_to_reach_receive_queue())
             logger.debug("Email in receive queue")
             controller.advance_time(lower_bound=50)
 
@@ -171,6 +198,7 @@ class SendBasicEmail(SimulationAction):
             # Try validation with retry/timeout
             start_validate_time = datetime.now()
             timeout_seconds = validator.timeout
+            backoff = VALIDATION_INITIAL_BACKOFF
 
             while True:
                 # Check if we need to timeout
@@ -179,15 +207,16 @@ class SendBasicEmail(SimulationAction):
                     logger.error(f"Validation timed out after {elapsed:.2f} seconds")
                     return False
 
-                # Try to validate
-                if validator.validate(controller):
+                # Only parse the email once it has actually been delivered
+                if validator.is_delivered() and validator.validate(controller):
                     logger.info(
                         f"Email validated successfully after {elapsed:.2f} seconds"
                     )
                     return True
 
-                # Brief pause before trying again
-                time.sleep(0.01)
+                # Back off before trying again
+                time.sleep(backoff)
+                backoff = min(backoff * 2, VALIDATION_MAX_BACKOFF)
 
         except Exception as e:
             logger.error(f"Error in SendBasicEmail action: {e}")
@@ -15,7 +15,9 @@ class AdvanceTime(SimulationAction):
         self, controller: DockerTimeController, data_generator: DataGenerator
     ) -> bool:
         try:
-            controller.advance_time()
+            # Nothing observes the time until the next email is sent, which flushes
+            # it. So let consecutive advances share a single write of the time file.
+            controller.advance_time(defer=True)
 
             return True
 
@@ -1,5 +1,4 @@
 import logging
-import random
 
 from email_sim.actions import SimulationAction, register_action
 from email_sim.controller import DockerTimeController
@@ -7,6 +6,19 @@ from email_sim.generator import DataGenerator
 
 logger = logging.getLogger("dst")
 
+# Fields `ModifyUser` can change, as bit flags so "all" is just their union
+MODIFY_EMAIL = 1
+MODIFY_NAME = 2
+MODIFY_COMPANY = 4
+
+# The modifications to pick from, with their names for logging
+_MODIFICATIONS = (
+    ("email", MODIFY_EMAIL),
+    ("name", MODIFY_NAME),
+    ("company", MODIFY_COMPANY),
+    ("all", MODIFY_EMAIL | MODIFY_NAME | MODIFY_COMPANY),
+)
+
 
 @register_action
 class AddUser(SimulationAction):
@@ -65,25 +77,26 @@ class ModifyUser(SimulationAction):
         self, controller: DockerTimeController, data_generator: DataGenerator
     ) -> bool:
         try:
+            faker = data_generator.faker
             user = data_generator.user_manager.get_random_user()
 
             logger.debug(f"Modifying user: {user}")
 
             # Determine what to modify
-            modification_type = random.choice(["email", "name", "company", "all"])
+            modification_type, fields = data_generator.rng.choice(_MODIFICATIONS)
 
             logger.debug(f"Modifying {modification_type}")
 
-            if modification_type == "email" or modification_type == "all":
-                user.email = data_generator.faker.email()
+            if fields & MODIFY_EMAIL:
+                user.email = faker.email()
 
-            if modification_type == "name" or modification_type == "all":
-                user.first_name = data_generator.faker.first_name()
-                user.last_name = data_generator.faker.last_name()
+            if fields & MODIFY_NAME:
+                user.first_name = faker.first_name()
+                user.last_name = faker.last_name()
 
-            if modification_type == "company" or modification_type == "all":
+            if fields & MODIFY_COMPANY:
                 user.company = (
-                    data_generator.faker.company() if random.random() > 0.5 else None
+                    faker.company() if data_generator.rng.random() > 0.5 else None
                 )
 
             logger.debug(f"Modified user: {user}")
@@ -1,10 +1,13 @@
 import asyncio
 import logging
+import os
 import random
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Any, Coroutine, Optional, TypeVar
 
 from python_on_whales import DockerClient
 from rich.progress import Progress, TaskID
@@ -13,13 +16,39 @@ from email_sim.timecontrol import TimeControl
 
 logger = logging.getLogger("dst")
 
+T = TypeVar("T")
+
 
 class DockerTimeController:
-    def __init__(self, progress: Progress, action_id: TaskID):
-        if not ensure_mail_directory():
-            raise RuntimeError(
-                "Could not set up mail directory with correct permissions"
-            )
+    def __init__(
+        self,
+        progress: Progress,
+        action_id: TaskID,
+        poll_initial_delay: float = 0.05,
+        poll_max_delay: float = 1.0,
+    ):
+        """
+        Do the one-off setup for the services.
+
+        The services themselves are only started by `reset()`, which every
+        simulation run calls after seeding. This allows a single controller to
+        be reused across runs.
+
+        Args:
+            poll_initial_delay: Seconds to wait after the first unsuccessful queue poll
+            poll_max_delay: Upper bound the poll delay backs off to, in seconds
+        """
+        self.docker = DockerClient()
+
+        # Compose builds missing images on `up` anyway, so only rebuild existing
+        # ones when asked to. Building takes far longer than the rest of the
+        # setup, so do it in the background. Nothing before `compose.up` in the
+        # first `reset()` depends on the images.
+        self._build = None
+        if os.environ.get("EMAIL_SIM_REBUILD") == "1":
+            executor = ThreadPoolExecutor(max_workers=1)
+            self._build = executor.submit(self.docker.compose.build, quiet=True)
+            executor.shutdown(wait=False)
 
         if not ensure_root_owns_exim_config("exim/send.conf"):
             raise RuntimeError("Could not set sending exim config to root ownership")
@@ -27,42 +56,93 @@ class DockerTimeController:
         if not ensure_root_owns_exim_config("exim/receive.conf"):
             raise RuntimeError("Could not set receiving exim config to root ownership")
 
+        # One event loop for every coroutine actions need to run, rather than
+        # spinning up a new loop per action with `asyncio.run`
+        self.loop = asyncio.new_event_loop()
+
+        self.progress = progress
+        self.action_id = action_id
+
+        # Every queue poll execs into a container, which already takes far longer
+        # than a millisecond, so back off between polls instead of spinning
+        self.poll_initial_delay = poll_initial_delay
+        self.poll_max_delay = poll_max_delay
+
+        # Whether the services are up, so they are only stopped once
+        self._running = False
+
+        # Per-run state, set up by `reset()`. The placeholder RNG is replaced by
+        # the run's seeded one.
+        self.rng = random.Random()
+        self.time_control: Optional[TimeControl] = None
+
+        # Time advanced with `defer=True` that has not been written out yet
+        self._pending_time = timedelta()
+
+    def reset(self, rng: random.Random) -> None:
+        """
+        (Re)start the services with an empty mail directory and a new initial time
+
+        Args:
+            rng: The run's RNG, used for the initial time and every time advance
+        """
+        self.rng = rng
+
+        if not ensure_mail_directory():
+            raise RuntimeError(
+                "Could not set up mail directory with correct permissions"
+            )
+
         # Generate a random time between 2020 and 2030
         start = datetime(2020, 1, 1)
         end = datetime(2030, 12, 31)
         days_between = (end - start).days
-        random_days = random.randint(0, days_between)
-        random_seconds = random.randint(0, 24 * 60 * 60 - 1)
+        random_days = rng.randint(0, days_between)
+        random_seconds = rng.randint(0, 24 * 60 * 60 - 1)
 
         self.initial_time = start + timedelta(days=random_days, seconds=random_seconds)
         logger.info(f"Initial simulation time: {self.initial_time}")
 
         # Initialize time control
         self.time_control = TimeControl(self.initial_time)
+        self._pending_time = timedelta()
 
-        self.docker = DockerClient()
-
-        self.progress = progress
-        self.action_id = action_id
-
-        # Start the services using compose
+        # Start the services using compose. The containers are always recreated
+        # so that no exim state carries over from a previous run.
         self.progress.update(
             self.action_id, advance=0, description="Starting Docker services"
         )
+        if self._build is not None:
+            # Wait for the background build, re-raising anything it failed with
+            self._build.result()
+            self._build = None
+
         self.docker.compose.up(
             wait=True,
-            build=True,
+            build=False,
             recreate=True,
             quiet=True,
         )
+        self._running = True
 
         # Convert list of containers to a map by service name
         containers = self.docker.compose.ps()
         if not containers:
             raise RuntimeError("No containers started")
 
+        # Compose labels every container with its service name, which unlike the
+        # container name doesn't depend on the project name
+        containers_by_service = {
+            container.config.labels["com.docker.compose.service"]: container
+            for container in containers
+        }
+
+        # Only keep the ids around. The container objects re-inspect the
+        # container whenever an attribute is read, and the ids are all that is
+        # needed to exec into them.
         self.containers = {
-            container.name.split("-")[1]: container for container in containers
+            service: container.id
+            for service, container in containers_by_service.items()
         }
 
         # Log available services
@@ -71,17 +151,33 @@ class DockerTimeController:
             logger.info(f"• {service}")
 
         # Get the sending exim container and its port
-        exim_send = self.containers["exim_send"]
+        exim_send = containers_by_service["exim_send"]
         port_mappings = exim_send.network_settings.ports["25/tcp"]
         if not port_mappings:
             raise RuntimeError("Could not find mapped port for sending MTA")
 
         self.send_port = int(port_mappings[0]["HostPort"])
 
-    def get_send_queue_size(self) -> int:
-        """Get the current size of the send queue"""
-        response = self.docker.compose.execute(
-            service="exim_send", command=["exim", "-bpc"], tty=False
+    def run_coro(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine to completion on the controller's event loop"""
+        try:
+            return self.loop.run_until_complete(coro)
+        finally:
+            # Like `asyncio.run`, don't let leftover tasks leak into the next call
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.loop.run_until_complete(
+                    asyncio.gather(*pending, return_exceptions=True)
+                )
+
+    def get_queue_size(self, service: str) -> int:
+        """Get the current size of the exim queue in the container for `service`"""
+        # Exec straight into the already resolved container. Going through
+        # `docker compose exec` would re-read the compose project on every poll.
+        response = self.docker.container.execute(
+            self.containers[service], ["exim", "-bpc"], tty=False
         )
 
         if response is None:
@@ -92,90 +188,154 @@ class DockerTimeController:
         except ValueError:
             return 0
 
+    def get_send_queue_size(self) -> int:
+        """Get the current size of the send queue"""
+        return self.get_queue_size("exim_send")
+
     async def wait_to_reach_send_queue(self) -> None:
         """Wait until the send queue has one email"""
+        delay = self.poll_initial_delay
         while True:
             queue_size = self.get_send_queue_size()
 
-            logger.debug(f"Send queue size: {queue_size}")
+            logger.debug("Send queue size: %s", queue_size)
 
             if queue_size == 1:
                 return
 
-            # Need a small async sleep to allow the send thread to continue
-            await asyncio.sleep(0.001)
+            # The async sleep also allows the send task to continue
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, self.poll_max_delay)
 
     def get_receive_queue_size(self) -> int:
-        """Get the current size of the send queue"""
-        response = self.docker.compose.execute(
-            service="exim_receive", command=["exim", "-bpc"], tty=False
-        )
-
-        if response is None:
-            return 0
-
-        try:
-            return int(response)
-        except ValueError:
-            return 0
-
-    def wait_to_reach_receive_queue(self) -> None:
-        """Wait until the receive queue has one email"""
+        """Get the current size of the receive queue"""
+        return self.get_queue_size("exim_receive")
+
+    async def wait_to_reach_receive_queue(self, timeout: float = 30.0) -> None:
+        """
+        Wait until the receive queue has one email
+
+        Raises:
+            TimeoutError: If the email did not reach the queue within `timeout` seconds
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = self.poll_initial_delay
         while True:
             queue_size = self.get_receive_queue_size()
 
-            logger.debug(f"Receive queue size: {queue_size}")
+            logger.debug("Receive queue size: %s", queue_size)
 
             if queue_size == 1:
                 return
 
+            if loop.time() >= deadline:
+                raise TimeoutError(
+                    f"Email did not reach the receive queue within {timeout} seconds"
+                )
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, self.poll_max_delay)
+
+    def _get_time_control(self) -> TimeControl:
+        """Get the time control of the current run"""
+        if self.time_control is None:
+            raise RuntimeError("The simulation time is only set up by reset()")
+
+        return self.time_control
+
     def get_time(self) -> datetime:
-        """Get the current simulation time"""
-        return self.time_control.get_time()
+        """Get the current simulation time, including any deferred advances"""
+        return self._get_time_control().get_time() + self._pending_time
+
+    def advance_time(
+        self, lower_bound: int = 1, upper_bound: int = 100, defer: bool = False
+    ) -> None:
+        """
+        Advance the simulation time by a random amount of milliseconds within the bounds
+
+        Args:
+            defer: Only accumulate the advance instead of writing it to the shared
+                time file. Consecutive deferred advances are written out together by
+                the next `flush_time()` or non-deferred advance.
+        """
+        milliseconds = self.rng.randint(lower_bound, upper_bound)
+
+        logger.debug("Advancing time by %s milliseconds", milliseconds)
+
+        self._pending_time += timedelta(milliseconds=milliseconds)
 
-    def advance_time(self, lower_bound: int = 1, upper_bound: int = 100) -> None:
-        """Advance the simulation time by a random amount of milliseconds within the bounds"""
-        milliseconds = random.randint(lower_bound, upper_bound)
-        new_time = self.get_time() + timedelta(milliseconds=milliseconds)
+        if not defer:
+            self.flush_time()
 
-        logger.debug(f"Advancing time by {milliseconds} milliseconds")
+    def flush_time(self) -> None:
+        """Write any deferred time advances out so the services see them"""
+        if not self._pending_time:
+            return
 
-        self.time_control.set_time(new_time)
+        time_control = self._get_time_control()
+        time_control.set_time(time_control.get_time() + self._pending_time)
+        self._pending_time = timedelta()
+
+    def stop(self) -> None:
+        """Stop the services between runs, keeping them around for the next `reset()`"""
+        if not self._running:
+            return
+
+        self.progress.update(
+            self.action_id, advance=0, description="Stopping Docker services"
+        )
+        self.docker.compose.stop()
+        self._running = False
 
     def cleanup(self):
         if self.docker:
-            self.progress.update(
-                self.action_id, advance=0, description="Stopping Docker services"
-            )
-            self.docker.compose.down(volumes=True, quiet=True)
+            # The next run recreates the containers anyway, so by default only stop
+            # them and keep the network around for it
+            if os.environ.get("EMAIL_SIM_CLEAN") == "1":
+                self.progress.update(
+                    self.action_id, advance=0, description="Removing Docker services"
+                )
+                self.docker.compose.down(volumes=True, quiet=True)
+            else:
+                self.stop()
 
-        if hasattr(self, "time_control"):
+        if self.time_control is not None:
             self.time_control.cleanup()
 
+        self.loop.close()
+
         logger.info("Environment cleanup completed")
 
 
+def remove_directory(path: Path) -> bool:
+    """Remove the directory at `path`, falling back to sudo if needed"""
+    try:
+        shutil.rmtree(path)
+        return True
+    except PermissionError:
+        logger.warning(f"Need sudo permissions to delete {path}.")
+        try:
+            subprocess.run(
+                ["sudo", "rm", "-R", str(path)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            return True
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Failed to delete directory: {e.stderr}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error deleting directory: {e}")
+            return False
+
+
 def ensure_mail_directory() -> bool:
     """Ensures mail directory exists with correct permissions"""
     mail_dir = Path("./tmp/mail")
-    if mail_dir.exists():
-        try:
-            shutil.rmtree(mail_dir)
-        except PermissionError:
-            logger.warning("Need sudo permissions to delete mail directory.")
-            try:
-                subprocess.run(
-                    ["sudo", "rm", "-R", str(mail_dir)],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to delete directory: {e.stderr}")
-                return False
-            except Exception as e:
-                logger.error(f"Unexpected error deleting directory: {e}")
-                return False
+    if mail_dir.exists() and not remove_directory(mail_dir):
+        return False
 
     mail_dir.mkdir(parents=True, exist_ok=True)
 
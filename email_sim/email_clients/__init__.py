@@ -1,8 +1,14 @@
 import random
 from typing import Dict, Type
 
+from jinja2 import BaseLoader, Environment
+
 from email_sim.generator.user import User
 
+# Shared environment for the clients to compile their templates with once, at
+# import time, rather than on every email
+template_environment = Environment(loader=BaseLoader())
+
 
 class EmailClient:
     """Base class for email clients"""
@@ -39,14 +45,14 @@ def register_email_client(cls: Type[EmailClient]):
     return cls
 
 
-def get_random_email_client() -> EmailClient:
-    """Get a random email client"""
+def get_random_email_client(rng: random.Random) -> EmailClient:
+    """Get a random email client using `rng`"""
     if not _email_client_registry:
         # Import clients to register them
         from . import default_client  # noqa
         from . import gmail  # noqa
         from . import outlook  # noqa
 
-    client_class = random.choice(list(_email_client_registry.values()))
+    client_class = rng.choice(list(_email_client_registry.values()))
 
     return client_class()
@@ -1,8 +1,10 @@
 import html
 
-from jinja2 import BaseLoader, Environment
-
-from email_sim.email_clients import EmailClient, register_email_client
+from email_sim.email_clients import (
+    EmailClient,
+    register_email_client,
+    template_environment,
+)
 from email_sim.generator.user import User
 
 
@@ -24,6 +26,8 @@ class OutlookClient(EmailClient):
         </body>
         </html>
     """
+    # Compiled once when the class is defined
+    TEMPLATE = template_environment.from_string(EMAIL_TEMPLATE)
 
     def generate_content(
         self, subject: str, sender: User, text_content: str
@@ -33,8 +37,7 @@ class OutlookClient(EmailClient):
         signature = sender.generate_signature()
         text_content_with_signature = f"{text_content}\n\n{signature}"
 
-        template = Environment(loader=BaseLoader()).from_string(self.EMAIL_TEMPLATE)
-        html_content = template.render(
+        html_content = self.TEMPLATE.render(
             subject=html.escape(subject),
             text_content=html.escape(text_content).replace("\n", "<br/>"),
             signature=html.escape(signature).replace("\n", "<br/>"),
@@ -6,12 +6,15 @@ from email_sim.generator.user_manager import UserManager
 
 
 class DataGenerator:
-    def __init__(self, seed: int):
-        """Initialize the data generator with an optional seed for reproducibility"""
+    def __init__(self, seed: int, rng: random.Random):
+        """Initialize the data generator with a seed and RNG for reproducibility"""
+        self.rng = rng
         self.faker = Faker()
-        Faker.seed(seed)
+        # Seed only this instance. `Faker.seed` reseeds the RNG shared by every
+        # Faker instance in the process.
+        self.faker.seed_instance(seed)
 
-        self.user_manager = UserManager(self.faker)
+        self.user_manager = UserManager(self.faker, rng)
 
         # Set up email subject prefix weights
         self.prefix_options = ["", "Re: ", "Fwd: "]
@@ -20,17 +23,17 @@ class DataGenerator:
     def generate_subject(self) -> str:
         """Generate an email subject with properly weighted prefixes"""
         # Use the weighted choice for the prefix
-        prefix = random.choices(self.prefix_options, weights=self.prefix_weights, k=1)[0]
+        prefix = self.rng.choices(self.prefix_options, weights=self.prefix_weights, k=1)[0]
 
-        subject_content = self.faker.sentence(nb_words=random.randint(3, 8)).rstrip('.')
+        subject_content = self.faker.sentence(nb_words=self.rng.randint(3, 8)).rstrip('.')
 
         return f"{prefix}{subject_content}"
 
-    def generate_paragraph(self) -> str:
-        """Generate a simple paragraph of text"""
-        # Simply use faker's built-in text generator
-        return self.faker.text(max_nb_chars=random.randint(150, 300))
-
     def generate_text_content(self, paragraphs: int = 3) -> str:
         """Generate text content with multiple paragraphs"""
-        return "\n\n".join(self.generate_paragraph() for _ in range(paragraphs))
+        # Generate all the paragraphs with one batch call to faker
+        texts = self.faker.texts(
+            nb_texts=paragraphs, max_nb_chars=self.rng.randint(150, 300)
+        )
+
+        return "\n\n".join(texts)
@@ -1,3 +1,4 @@
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from email.message import EmailMessage
@@ -7,6 +8,35 @@ from email.mime.text import MIMEText
 from email_sim.generator import DataGenerator
 from email_sim.generator.user import User
 
+# RFC 2822 day and month names. These are fixed ASCII, unlike strftime's %a and
+# %b which follow the locale.
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+# Digits in a multipart boundary token, matching the email package's own
+_BOUNDARY_WIDTH = len(repr(sys.maxsize - 1))
+
+
+def format_email_date(date: datetime) -> str:
+    """Format `date` for the Date header, treating it as UTC"""
+    return (
+        f"{_WEEKDAYS[date.weekday()]}, {date.day:02d} {_MONTHS[date.month - 1]} "
+        f"{date.year} {date.hour:02d}:{date.minute:02d}:{date.second:02d} +0000"
+    )
+
 
 @dataclass
 class GeneratedEmail:
@@ -16,6 +46,7 @@ class GeneratedEmail:
     text_content: str
     html_content: str
     date: datetime
+    boundary: str
 
     def __init__(self, data_generator: DataGenerator, date: datetime):
         """Generate a complete email message"""
@@ -36,6 +67,12 @@ class GeneratedEmail:
         self.html_content = html_content
         self.date = date
 
+        # The email package draws multipart boundaries from the global `random`
+        # module, which isn't seeded. Draw it from the run's RNG instead, in the
+        # same shape, so both runs deliver identical files.
+        token = data_generator.rng.randrange(sys.maxsize)
+        self.boundary = f"{'=' * 15}{token:0{_BOUNDARY_WIDTH}d}=="
+
     def build_email(self) -> EmailMessage:
         """Build an EmailMessage object from the generated email"""
         msg = EmailMessage()
@@ -48,10 +85,10 @@ class GeneratedEmail:
             f"{self.recipient.first_name} {self.recipient.last_name} <{self.recipient.email}>"
         )
         msg["Subject"] = self.subject
-        msg["Date"] = self.date.strftime("%a, %d %b %Y %H:%M:%S +0000")
+        msg["Date"] = format_email_date(self.date)
 
         # Create multipart message
-        msg_alternative = MIMEMultipart("alternative")
+        msg_alternative = MIMEMultipart("alternative", boundary=self.boundary)
         msg_alternative.attach(MIMEText(self.text_content, "plain"))
         msg_alternative.attach(MIMEText(self.html_content, "html"))
 
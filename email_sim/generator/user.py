@@ -19,11 +19,7 @@ class User:
 
     def generate_signature(self) -> str:
         """Generate an email signature for a user"""
-        signature_parts = [
-            f"{self.first_name} {self.last_name}",
-        ]
         if self.company:
-            signature_parts.append(self.company)
-        signature_parts.append(self.email)
+            return f"{self.first_name} {self.last_name}\n{self.company}\n{self.email}"
 
-        return "\n".join(signature_parts)
+        return f"{self.first_name} {self.last_name}\n{self.email}"
@@ -12,11 +12,12 @@ logger = logging.getLogger("dst")
 class UserManager:
     """Manages a pool of user for email simulation"""
 
-    def __init__(self, faker: Faker):
+    def __init__(self, faker: Faker, rng: random.Random):
         self._faker = faker
+        self._rng = rng
         self._users = []
 
-        for _ in range(random.randint(1, 10)):
+        for _ in range(self._rng.randint(1, 10)):
             self.add_random_user()
 
     def generate_user(self) -> User:
@@ -30,8 +31,8 @@ class UserManager:
             first_name=self._faker.first_name(),
             last_name=self._faker.last_name(),
             email=email,
-            company=self._faker.company() if random.random() > 0.5 else None,
-            email_client=get_random_email_client(),
+            company=self._faker.company() if self._rng.random() > 0.5 else None,
+            email_client=get_random_email_client(self._rng),
         )
 
         logger.debug(f"Generated user: {user}")
@@ -40,7 +41,7 @@ class UserManager:
 
     def get_random_user(self) -> User:
         """Get a random user from the pool"""
-        user = random.choice(self._users)
+        user = self._rng.choice(self._users)
 
         logger.debug(f"Selected user: {user}")
 
@@ -53,7 +54,7 @@ class UserManager:
 
     def remove_random_user(self) -> None:
         """Remove a random user from the pool"""
-        index = random.randint(0, len(self._users) - 1)
+        index = self._rng.randint(0, len(self._users) - 1)
         logger.debug(f"Removing user {self._users[index]}")
 
         self._users.pop(index)
@@ -1,15 +1,16 @@
+import filecmp
+import itertools
 import logging
 import random
-import shutil
 import subprocess
 import time
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 from rich.progress import Progress, TaskID
 
 from email_sim.actions import SimulationAction
-from email_sim.controller import DockerTimeController
+from email_sim.controller import DockerTimeController, remove_directory
 from email_sim.generator import DataGenerator
 
 logger = logging.getLogger("dst")
@@ -18,6 +19,15 @@ logger = logging.getLogger("dst")
 HEADER = 25  # Between INFO (20) and WARNING (30)
 logging.addLevelName(HEADER, "HEADER")
 
+# Banner separators used in the step headers and the summary
+STEP_SEPARATOR = "=" * 30
+STEP_SUBSEPARATOR = "-" * 30
+SUMMARY_SEPARATOR = "#" * 50
+SUMMARY_SUBSEPARATOR = "-" * 50
+
+# How many lines of a diff between two runs to show
+DIFF_PREVIEW_LINES = 20
+
 
 # Add a custom method to the logger class
 def header(self, message, *args, **kwargs):
@@ -37,28 +47,59 @@ class SimulationRunner:
         action_id: TaskID,
         seed: int,
         steps: int = 100,
+        controller: Optional[DockerTimeController] = None,
     ):
-        # Make sure the seed is reset for each run
-        random.seed(seed)
+        # Own RNG for everything the runner, controller and data generator draw,
+        # so runs don't share state through the global `random` module
+        self.rng = random.Random(seed)
 
         weights = [action.weight for action in actions]
-        total_weight = sum(weights)
 
         self.actions = actions
-        self.normalized_weights = [w / total_weight for w in weights]
+
+        # Precompute what gets logged for each action so the per-step work is
+        # just an index lookup
+        self._action_names = [action.__class__.__name__ for action in actions]
+        self._weights_str = [f"{action.weight:.2f}" for action in actions]
+
+        # Pick the selection strategy once. With equal weights a plain uniform
+        # choice is enough, otherwise sample from precomputed alias tables.
+        # Either way the picker returns the index of the selected action.
+        if len(set(weights)) == 1:
+            self._pick = lambda: self.rng.randrange(len(self.actions))
+        else:
+            self._alias_prob, self._alias = _build_alias(weights)
+            self._pick = self._pick_alias
+
         self.progress = progress
         self.action_id = action_id
         self.steps = steps
-        self.controller = DockerTimeController(progress, action_id)
-        self.data_generator = DataGenerator(seed)
+
+        # The weights never change during a run, so draw the whole action
+        # schedule up front instead of sampling once per step
+        self._schedule = [self._pick() for _ in range(steps)]
+
+        # Only clean up the controller at the end of the run if we created it
+        self._owns_controller = controller is None
+        self.controller = controller or DockerTimeController(progress, action_id)
+        self.controller.reset(self.rng)
+
+        self.data_generator = DataGenerator(seed, self.rng)
+
+    def _pick_alias(self) -> int:
+        """Draw a weighted action index in constant time using the alias tables"""
+        i = int(self.rng.random() * len(self.actions))
+        if self.rng.random() < self._alias_prob[i]:
+            return i
+        return self._alias[i]
 
     def execute_action(self, action) -> bool:
         """Execute a single action with enhanced step display"""
         try:
             # Execute the action
-            start_time = time.time()
+            start_time = time.perf_counter()
             success = action(self.controller, self.data_generator)
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
 
             # Log execution result with timing
             if success:
@@ -75,36 +116,34 @@ class SimulationRunner:
     def run(self) -> bool:
         """Run the simulation synchronously with enhanced summary"""
         success = True
-        start_time = time.time()
+        start_time = time.perf_counter()
         action_counts = {}  # Track how many times each action was executed
         current_step = 0
 
         try:
             logger.info(f"Starting simulation with {len(self.actions)} actions")
 
-            while current_step < self.steps:
-                # Select action based on weights
-                action = random.choices(
-                    self.actions, weights=self.normalized_weights, k=1
-                )[0]
-                action_name = action.__class__.__name__
+            for current_step, index in enumerate(self._schedule, 1):
+                action = self.actions[index]
+                action_name = self._action_names[index]
 
                 # Track action counts
                 action_counts[action_name] = action_counts.get(action_name, 0) + 1
-                current_step += 1
 
-                # Create a step header with clear visual separation
-                logger.header(f"{'=' * 30}")
-                logger.header(f"STEP {current_step}/{self.steps}")
-                logger.header(f"{'-' * 30}")
+                # Create a step header with clear visual separation. Each block is
+                # emitted as a single multi-line record to keep handler work down,
+                # and only formatted when it would actually be logged.
+                if logger.isEnabledFor(HEADER):
+                    logger.header(
+                        f"{STEP_SEPARATOR}\nSTEP {current_step}/{self.steps}\n{STEP_SUBSEPARATOR}"
+                    )
 
                 # Log action details with more context
-                logger.info(
-                    f"✓ Action: [bold]{action_name}[/bold] (weight: {action.weight:.2f})"
-                )
-                logger.info(
-                    f"✓ Time: {self.controller.get_time().strftime('%Y-%m-%d %H:%M:%S.%f')}"
-                )
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(
+                        f"✓ Action: [bold]{action_name}[/bold] (weight: {self._weights_str[index]})\n"
+                        f"✓ Time: {self.controller.get_time().strftime('%Y-%m-%d %H:%M:%S.%f')}"
+                    )
 
                 # Update progress in the UI
                 self.progress.update(
@@ -124,60 +163,134 @@ class SimulationRunner:
                 )
 
             # Final status message
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
 
             # Print simulation summary with separator for visibility
-            logger.header("")
-            logger.header(f"{'#' * 50}")
-            logger.header(f"SIMULATION SUMMARY")
-            logger.header(f"{'-' * 50}")
-
-            if success:
-                logger.header(f"✨ Status: Completed successfully!")
-            else:
-                logger.header(f"[red]Status: Failed![/]")
+            if logger.isEnabledFor(HEADER):
+                logger.header("")
+                logger.header(SUMMARY_SEPARATOR)
+                logger.header(f"SIMULATION SUMMARY")
+                logger.header(SUMMARY_SUBSEPARATOR)
+
+                if success:
+                    logger.header(f"✨ Status: Completed successfully!")
+                else:
+                    logger.header(f"[red]Status: Failed![/]")
 
-            logger.header(f"Total time: {total_time:.2f} seconds")
-            logger.header(f"Steps completed: {current_step}/{self.steps}")
+                logger.header(f"Total time: {total_time:.2f} seconds")
+                logger.header(f"Steps completed: {current_step}/{self.steps}")
 
-            # Show action distribution
-            logger.header("")
-            logger.header(f"Action distribution:")
-            for action_name, count in sorted(
-                action_counts.items(), key=lambda x: x[1], reverse=True
-            ):
-                percentage = (count / current_step) * 100
-                logger.header(f"  • {action_name}: {count} times ({percentage:.1f}%)")
+                # Show action distribution
+                logger.header("")
+                logger.header(f"Action distribution:")
+                for action_name, count in sorted(
+                    action_counts.items(), key=lambda x: x[1], reverse=True
+                ):
+                    percentage = (count / current_step) * 100
+                    logger.header(
+                        f"  • {action_name}: {count} times ({percentage:.1f}%)"
+                    )
 
-            logger.header(f"{'#' * 50}")
+                logger.header(SUMMARY_SEPARATOR)
 
             return success
         finally:
-            self.controller.cleanup()
+            if self._owns_controller:
+                self.controller.cleanup()
+            else:
+                self.controller.stop()
+
+
+def _build_alias(weights: List[float]) -> tuple[List[float], List[int]]:
+    """Build Walker alias tables (Vose's method) for O(1) weighted sampling"""
+    n = len(weights)
+    total = sum(weights)
+    scaled = [w * n / total for w in weights]
+
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+
+        prob[less] = scaled[less]
+        alias[less] = more
+
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+
+    # Whatever is left over is only off from 1.0 due to floating point error
+    return prob, alias
 
 
-def move_tmp_directory(seed: int, steps: int) -> Path:
+def move_tmp_directory(seed: int, steps: int) -> Optional[Path]:
     """Move tmp directory with seed and steps in name"""
     src = Path("./tmp/mail")
     if not src.exists():
         return None
 
     dst = Path(f"./tmp/seed{seed}_steps{steps}")
-    if dst.exists():
-        shutil.rmtree(dst)
+    # The moved mail is owned by the exim user, so this might need sudo
+    if dst.exists() and not remove_directory(dst):
+        return None
 
-    shutil.copytree(src, dst)
+    # A rename is only a metadata update, unlike copying every mail file. The
+    # next run recreates an empty mail directory when it starts.
+    src.rename(dst)
     return dst
 
 
+def directories_identical(dir1: Path, dir2: Path) -> bool:
+    """Check whether two directory trees have the same files with the same contents"""
+    comparison = filecmp.dircmp(dir1, dir2)
+    if comparison.left_only or comparison.right_only or comparison.common_funny:
+        return False
+
+    _, mismatch, errors = filecmp.cmpfiles(
+        dir1, dir2, comparison.common_files, shallow=False
+    )
+    if mismatch or errors:
+        return False
+
+    return all(
+        directories_identical(dir1 / name, dir2 / name)
+        for name in comparison.common_dirs
+    )
+
+
 def compare_runs(dir1: Path, dir2: Path) -> bool:
-    """Compare two directories using system diff command"""
+    """Compare two directories, using system diff to show any differences"""
     try:
-        result = subprocess.run(
-            ["diff", "-ru", str(dir1), str(dir2)], capture_output=True, text=True
-        )
+        # Identical runs are the common case, and only need a boolean. So check
+        # in-process first and only run diff when there is something to show.
+        if directories_identical(dir1, dir2):
+            logger.header(
+                "[green bold]Success: Both runs produced identical results![/]"
+            )
+            return True
 
-        if result.returncode == 0:
+        # Stream the diff and only read as many lines as will be shown, rather
+        # than buffering the whole (potentially huge) output in memory
+        with subprocess.Popen(
+            ["diff", "-ru", str(dir1), str(dir2)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ) as process:
+            # Always set, since stdout is piped
+            assert process.stdout is not None
+            diff_output = list(itertools.islice(process.stdout, DIFF_PREVIEW_LINES))
+            if diff_output:
+                # The rest of the diff is never shown so stop diff early
+                process.terminate()
+            returncode = process.wait()
+
+        if returncode == 0:
             logger.header(
                 "[green bold]Success: Both runs produced identical results![/]"
             )
@@ -186,8 +299,12 @@ def compare_runs(dir1: Path, dir2: Path) -> bool:
             logger.warning("Warning: Differences found between runs!")
             # For large diffs, this would be better in a scrollable panel
             # but for now, just output the first few lines
-            diff_output = result.stdout.split("\n")[:20]
-            for line in diff_output:
+            for raw_line in diff_output:
+                # Only decode the few lines that are actually shown
+                line = raw_line.rstrip(b"\n").decode(errors="replace")
+                if not line:
+                    continue
+
                 if line.startswith("+"):
                     logger.info(f"[green]{line}[/green]")
                 elif line.startswith("-"):
@@ -196,8 +313,8 @@ def compare_runs(dir1: Path, dir2: Path) -> bool:
                     logger.info(line)
             return False
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error running diff: {e}")
+    except OSError as e:
+        logger.error(f"Error comparing runs: {e}")
         return False
 
 
@@ -210,34 +327,43 @@ def run_simulation_with_comparison(
     steps: int = 100,
 ) -> bool:
     """Run two identical simulations and compare results"""
-    # First run
-    logger.info("Running first simulation...")
-    progress.update(sim_number_id, advance=0.5, description="1st simulation")
-    runner1 = SimulationRunner(actions, progress, action_id, seed, steps)
-    success1 = runner1.run()
-    if not success1:
-        return False
-
-    # Move first run results
-    dir1 = move_tmp_directory(seed, steps)
+    # Share one controller between both runs so the images are only built and
+    # the configs only checked once
+    controller = DockerTimeController(progress, action_id)
 
-    # Second run
-    logger.info("Running second simulation...")
-    progress.update(sim_number_id, advance=1, description="2nd simulation")
-    progress.reset(action_id)
-    runner2 = SimulationRunner(actions, progress, action_id, seed, steps)
-    success2 = runner2.run()
-    if not success2:
-        return False
+    try:
+        # First run
+        logger.info("Running first simulation...")
+        progress.update(sim_number_id, advance=0.5, description="1st simulation")
+        runner1 = SimulationRunner(
+            actions, progress, action_id, seed, steps, controller=controller
+        )
+        success1 = runner1.run()
+        if not success1:
+            return False
 
-    # Compare results using system diff
-    progress.update(sim_number_id, advance=0.5, description="Getting diff")
-    result = compare_runs(dir1, Path("./tmp/mail"))
+        # Move first run results
+        dir1 = move_tmp_directory(seed, steps)
+        if dir1 is None:
+            logger.error("Could not move the results of the first simulation")
+            return False
 
-    # Give time for final logs to appear
-    time.sleep(0.5)
+        # Second run
+        logger.info("Running second simulation...")
+        progress.update(sim_number_id, advance=1, description="2nd simulation")
+        progress.reset(action_id)
+        runner2 = SimulationRunner(
+            actions, progress, action_id, seed, steps, controller=controller
+        )
+        success2 = runner2.run()
+        if not success2:
+            return False
 
-    return result
+        # Compare results using system diff
+        progress.update(sim_number_id, advance=0.5, description="Getting diff")
+        return compare_runs(dir1, Path("./tmp/mail"))
+    finally:
+        controller.cleanup()
 
 
 def run_simulation(
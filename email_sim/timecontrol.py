@@ -1,6 +1,5 @@
 import logging
 import os
-import shutil
 import threading
 from datetime import datetime
 from pathlib import Path
@@ -19,16 +18,23 @@ class TimeControl:
     """
 
     def __init__(self, initial_time: datetime):
-        self.time_file = Path("./tmp/faketime")
+        # The containers mount the parent directory rather than the file itself.
+        # A single-file bind mount pins the original inode, so the containers would
+        # never see the file that `set_time` renames into place.
+        self.time_file = Path("./tmp/time/faketime")
+        self.time_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Sometimes starting docker manually causes the `faketime` file to become a direcotry
-        # So just auto fix that
-        if self.time_file.is_dir():
-            logger.warning(f"Found 'faketime' as a directory, converting to file")
-            shutil.rmtree(self.time_file)
+        # If the containers are started before this runs, Docker creates the
+        # directory for the mount itself, owned by root. Say so rather than fail
+        # on the first write.
+        if not os.access(self.time_file.parent, os.W_OK):
+            raise RuntimeError(
+                f"Cannot write to {self.time_file.parent}. It was probably created "
+                "by Docker, remove it and try again."
+            )
 
-        self.time_file.parent.mkdir(parents=True, exist_ok=True)
         self._lock = threading.Lock()
+        self._cached_time = initial_time
         self.set_time(initial_time)
 
     def set_time(self, new_time: datetime) -> None:
@@ -36,12 +42,11 @@ class TimeControl:
         with self._lock:
             timestamp = new_time.strftime("%Y-%m-%d %H:%M:%S.%f")
 
-            # IMPORTANT: We use an append-then-truncate approach to prevent the file
-            # from ever being empty. If libfaketime reads an empty file (which can happen
-            # with standard write operations that truncate before writing), it will
-            # revert to system time and break deterministic testing. Or it will just freeze
-            # up exim (sending will timeout) and the exim debug logs will have something
-            # like this after an SMTP transaction:
+            # IMPORTANT: The file must never be empty. If libfaketime reads an empty
+            # file (which can happen with standard write operations that truncate
+            # before writing), it will revert to system time and break deterministic
+            # testing. Or it will just freeze up exim (sending will timeout) and the
+            # exim debug logs will have something like this after an SMTP transaction:
             #
             # 23:16:37.000    15 tick check: 1796944597.000000 1796944597.000000
             # 23:16:37.000    15 waiting 0.000500 sec
@@ -55,29 +60,36 @@ class TimeControl:
             # [pid    69] fstat(9, {st_mode=S_IFREG|0644, st_size=0, ...}) = 0
             # [pid    69] read(9, "", 4096)           = 0
             # [pid    69] close(9)
-
-            # First append to ensure the file is never empty
-            with open(self.time_file, "a") as f:
-                f.write("\n" + timestamp)
+            #
+            # So write the new time to a sibling file and atomically rename it over
+            # the shared file. Readers either open the old file or the new one, and
+            # both are always complete.
+            tmp_file = self.time_file.with_suffix(".tmp")
+            with open(tmp_file, "w") as f:
+                f.write(timestamp)
                 f.flush()
                 os.fsync(f.fileno())
 
-            # Then truncate to keep only the last line
-            with open(self.time_file, "r+") as f:
-                lines = f.readlines()
-                f.seek(0)
-                f.write(lines[-1])
-                f.truncate()
-                f.flush()
-                os.fsync(f.fileno())
+            os.replace(tmp_file, self.time_file)
+
+            # Make the rename itself durable
+            dir_fd = os.open(self.time_file.parent, os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+            # Only this process writes the file, so in-process readers can use
+            # the last time set instead of reading and parsing the file again
+            self._cached_time = new_time
 
-            logger.info(f"Updated simulation time to: {timestamp}")
+            # Defer the formatting to the handlers, if the record is handled at all
+            logger.info("Updated simulation time to: %s", timestamp)
 
     def get_time(self) -> datetime:
-        """Read the current time from the shared file"""
+        """Get the current time as last set"""
         with self._lock:
-            timestamp = self.time_file.read_text().strip()
-            return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
+            return self._cached_time
 
     def cleanup(self) -> None:
         """Clean up time control resources"""